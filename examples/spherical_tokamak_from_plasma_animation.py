@@ -32,14 +32,14 @@ def create_reactor(
         coil_height_factor=original_coil_height_factor,
         divertor_thickness=original_divertor_thickness
 ):
-    reactor_diameter = sum([layer[1] for layer in radial_build])
+    reactor_diameter = sum(layer[1] for layer in radial_build)
     minor_radius = radial_build[4][1] / 2
-    major_radius = sum([layer[1] for layer in radial_build][:4]) + minor_radius
+    major_radius = sum(layer[1] for layer in radial_build[:4]) + minor_radius
 
     theta = 3 * np.pi / 2
     divertor_radius = major_radius + minor_radius * np.cos(theta + triangularity * np.sin(theta))
 
-    reactor_height = elongation * radial_build[4][1] * 0.5 + sum([layer[1] for layer in radial_build[5:]])
+    reactor_height = elongation * radial_build[4][1] * 0.5 + sum(layer[1] for layer in radial_build[5:])
 
     # makes a rectangle that overlaps the lower blanket under the plasma
     # the intersection of this and the layers will form the lower divertor
@@ -1,6 +1,5 @@
 from pathlib import Path
 import paramak
-from cadquery import exporters
 
 my_reactor = paramak.spherical_tokamak_from_plasma(
     radial_build=[
@@ -19,7 +18,5 @@ my_reactor = paramak.spherical_tokamak_from_plasma(
     rotation_angle=180,
 )
 
-compound = my_reactor.toCompound()
-
-exporters.export(compound, "spherical_tokamak_from_plasma_minimal.step")
+my_reactor.save("spherical_tokamak_from_plasma_minimal.step", write_pcurves=False)
 print("STEP file written.")
@@ -33,9 +33,7 @@ my_reactor = paramak.spherical_tokamak_from_plasma(
     }
 )
 
-compound = my_reactor.toCompound()
-
-exporters.export(compound, "spherical_tokamak_from_plasma_with_color.step")
+my_reactor.save("spherical_tokamak_from_plasma_with_color.step", write_pcurves=False)
 print("STEP file written.")
 
 my_reactor.exportPNG(
@@ -49,5 +47,6 @@ my_reactor.exportPNG(
 )
 print("PNG file written.")
 
+compound = my_reactor.toCompound()
 exporters.export(compound, "spherical_tokamak_from_plasma_with_color.svg", exportType="SVG")
 print("SVG file written.")
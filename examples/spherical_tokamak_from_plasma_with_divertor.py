@@ -34,7 +34,7 @@ my_reactor = paramak.spherical_tokamak_from_plasma(
 
 compound = my_reactor.toCompound()
 
-compound.exportStep("spherical_tokamak_from_plasma_with_divertor.step")
+my_reactor.save("spherical_tokamak_from_plasma_with_divertor.step", write_pcurves=False)
 print("STEP file written.")
 
 my_reactor.exportPNG(
@@ -1,4 +1,3 @@
-from cadquery import exporters
 import paramak
 
 extra_cut_shapes = []
@@ -36,6 +35,5 @@ my_reactor = paramak.spherical_tokamak_from_plasma(
     extra_cut_shapes=extra_cut_shapes,
 )
 
-compound = my_reactor.toCompound()
-exporters.export(compound, "spherical_tokamak_from_plasma_with_pf_magnets.step")
+my_reactor.save("spherical_tokamak_from_plasma_with_pf_magnets.step", write_pcurves=False)
 print("STEP file written.")
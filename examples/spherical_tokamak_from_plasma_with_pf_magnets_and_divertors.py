@@ -1,4 +1,3 @@
-from cadquery import exporters
 import paramak
 
 rotation_angle = 180
@@ -39,6 +38,5 @@ my_reactor = paramak.spherical_tokamak_from_plasma(
     extra_cut_shapes=poloidal_field_coils,
 )
 
-compound = my_reactor.toCompound()
-exporters.export(compound, "spherical_tokamak_from_plasma_with_pf_magnets_and_divertor.step")
+my_reactor.save("spherical_tokamak_from_plasma_with_pf_magnets_and_divertor.step", write_pcurves=False)
 print("STEP file written.")
@@ -1,5 +1,4 @@
 import paramak
-from cadquery import exporters
 
 rotation_angle = 90
 
@@ -31,7 +30,7 @@ result1 = paramak.spherical_tokamak_from_plasma(
     extra_cut_shapes=[tf_style_1],
 )
 
-exporters.export(result1.toCompound(), "spherical_tokamak_from_plasma_with_rect_tf_coils.step")
+result1.save("spherical_tokamak_from_plasma_with_rect_tf_coils.step", write_pcurves=False)
 
 tf_style_2 = paramak.toroidal_field_coil_princeton_d(
     r1=5,
@@ -60,4 +59,4 @@ result2 = paramak.spherical_tokamak_from_plasma(
     extra_cut_shapes=[tf_style_2],
 )
 
-exporters.export(result2.toCompound(), "spherical_tokamak_from_plasma_with_prin_tf_coils.step")
+result2.save("spherical_tokamak_from_plasma_with_prin_tf_coils.step", write_pcurves=False)
@@ -1,5 +1,4 @@
 import paramak
-from cadquery import exporters
 
 my_reactor = paramak.spherical_tokamak(
     radial_build=[
@@ -28,4 +27,4 @@ my_reactor = paramak.spherical_tokamak(
     triangularity=-0.55,
 )
 
-exporters.export(my_reactor.toCompound(), "spherical_tokamak_minimal.step")
+my_reactor.save("spherical_tokamak_minimal.step", write_pcurves=False)
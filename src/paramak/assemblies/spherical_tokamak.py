@@ -1,44 +1,120 @@
-from typing import Optional, Sequence, Tuple, Union
+from typing import NamedTuple, Optional, Sequence, Tuple, Union
 
 import cadquery as cq
+import numpy as np
+from OCP.BOPAlgo import BOPAlgo_Options
+from OCP.Bnd import Bnd_Box
+from OCP.OSD import OSD_Parallel
 from .assembly import Assembly
 
 from ..utils import (
+    add_to_assembly,
+    bounding_box,
+    count_solids,
+    cumulative_offsets,
+    cut_workplane,
     get_plasma_index,
-    get_plasma_value,
     sum_up_to_gap_before_plasma,
-    sum_up_to_plasma,
     sum_before_after_plasma,
+    to_shape_list,
+    union_workplanes,
     LayerType,
 )
-from ..workplanes.blanket_from_plasma import blanket_from_plasma
+from ..workplanes.blanket_from_plasma import blanket_from_plasma, plasma_boundary
 from ..workplanes.center_column_shield_cylinder import center_column_shield_cylinder
 from ..workplanes.plasma_simplified import plasma_simplified
 
+# runs the OCCT boolean operations (cut, union, intersect) in parallel
+BOPAlgo_Options.SetParallelMode_s(True)
+OSD_Parallel.SetUseOcctThreads_s(True)
+
+
+class _BuildIndex(NamedTuple):
+    """Values derived from the radial and vertical builds that are needed
+    several times while building the reactor. Computing them once avoids
+    repeatedly scanning the builds."""
+
+    plasma_index_radial: int
+    plasma_index_vertical: int
+    sum_up_to_plasma: float
+    sum_up_to_gap_before_plasma: float
+    plasma_radial_thickness: float
+    plasma_vertical_thickness: float
+    vertical_before_plasma: float
+    total_height: float
+    # offset from the plasma to the inner face of each entry after the plasma
+    radial_offsets: np.ndarray
+    upper_vertical_offsets: np.ndarray
+    lower_vertical_offsets: np.ndarray
+
+
+def _build_index(radial_build, vertical_build) -> _BuildIndex:
+    plasma_index_radial = get_plasma_index(radial_build)
+    plasma_index_vertical = get_plasma_index(vertical_build)
+
+    outer_radial_build = radial_build[plasma_index_radial + 1:]
+    upper_vertical_build = vertical_build[plasma_index_vertical + 1:]
+    lower_vertical_build = vertical_build[:plasma_index_vertical][::-1]
+
+    before, _ = sum_before_after_plasma(vertical_build)
+
+    return _BuildIndex(
+        plasma_index_radial=plasma_index_radial,
+        plasma_index_vertical=plasma_index_vertical,
+        sum_up_to_plasma=sum(item[1] for item in radial_build[:plasma_index_radial]),
+        sum_up_to_gap_before_plasma=sum_up_to_gap_before_plasma(radial_build),
+        plasma_radial_thickness=radial_build[plasma_index_radial][1],
+        plasma_vertical_thickness=vertical_build[plasma_index_vertical][1],
+        vertical_before_plasma=before,
+        total_height=sum(item[1] for item in vertical_build),
+        radial_offsets=cumulative_offsets([item[1] for item in outer_radial_build]),
+        upper_vertical_offsets=cumulative_offsets([item[1] for item in upper_vertical_build]),
+        lower_vertical_offsets=cumulative_offsets([item[1] for item in lower_vertical_build]),
+    )
+
+
+def _cut_layer(entry, entry_box, cutters, fuzzy_value=None):
+    """Cuts the cutters from the entry. The cutters are (shape, bounding box)
+    pairs and cutters with a bounding box that does not overlap the entry_box
+    are skipped. Returns the cut entry and if any cut was made."""
+    was_modified = False
+    for cutter, cutter_box in cutters:
+        if entry_box.IsOut(cutter_box):
+            continue
+        entry = entry.cut(cutter, tol=fuzzy_value)
+        was_modified = True
+    return entry, was_modified
+
 
 def create_blanket_layers_after_plasma(
         radial_build, vertical_build, minor_radius, major_radius, triangularity, elongation, rotation_angle,
-        center_column
+        center_column, build_index=None
 ):
-    layers = []
-    cumulative_thickness_rb = 0
-    cumulative_thickness_uvb = 0
-    cumulative_thickness_lvb = 0
+    if build_index is None:
+        build_index = _build_index(radial_build, vertical_build)
 
-    plasma_index_radial = get_plasma_index(radial_build)
-    plasma_index_vertical = get_plasma_index(vertical_build)
+    layers = []
+    plasma_index_radial = build_index.plasma_index_radial
+    # the same cutter is used for every layer so the tools are only built once
+    center_column_tools = to_shape_list([center_column])
+    # every layer is offset from the same plasma boundary
+    plasma_points = plasma_boundary(
+        np.linspace(-90, 90, num=50, endpoint=True),
+        major_radius=major_radius,
+        minor_radius=minor_radius,
+        triangularity=triangularity,
+        elongation=elongation,
+    )
+    plasma_index_vertical = build_index.plasma_index_vertical
 
     for i, item in enumerate(radial_build[plasma_index_radial + 1:]):
+        if item[0] == LayerType.GAP:
+            continue
+
         upper_thicknees = vertical_build[plasma_index_vertical + 1 + i][1]
         lower_thicknees = vertical_build[plasma_index_vertical - 1 - i][1]
         radial_thickness = item[1]
 
-        if item[0] == LayerType.GAP:
-            cumulative_thickness_rb += radial_thickness
-            cumulative_thickness_uvb += upper_thicknees
-            cumulative_thickness_lvb += lower_thicknees
-            continue
-
         layer = blanket_from_plasma(
             minor_radius=minor_radius,
             major_radius=major_radius,
@@ -50,9 +126,9 @@ def create_blanket_layers_after_plasma(
                 upper_thicknees,
             ],
             offset_from_plasma=[
-                cumulative_thickness_lvb,
-                cumulative_thickness_rb,
-                cumulative_thickness_uvb,
+                build_index.lower_vertical_offsets[i],
+                build_index.radial_offsets[i],
+                build_index.upper_vertical_offsets[i],
             ],
             start_angle=-90,
             stop_angle=90,
@@ -61,42 +137,39 @@ def create_blanket_layers_after_plasma(
             name=f"layer_{plasma_index_radial + i + 1}",
             allow_overlapping_shape=True,
             connect_to_center=True,
+            plasma_points=plasma_points,
         )
-        layer = layer.cut(center_column)
-        cumulative_thickness_rb += radial_thickness
-        cumulative_thickness_uvb += upper_thicknees
-        cumulative_thickness_lvb += lower_thicknees
+        layer = cut_workplane(layer, center_column_tools)
         layers.append(layer)
 
     return layers
 
 
-def create_center_column_shield_cylinders(radial_build, vertical_build, rotation_angle):
+def create_center_column_shield_cylinders(radial_build, vertical_build, rotation_angle, build_index=None):
+    if build_index is None:
+        build_index = _build_index(radial_build, vertical_build)
+
     cylinders = []
     total_sum = 0
     layer_count = 0
 
-    before, _ = sum_before_after_plasma(vertical_build)
-    center_column_shield_height = sum([item[1] for item in vertical_build])
+    # every cylinder shares the same height and vertical position
+    center_column_shield_height = build_index.total_height
+    reference_point = ("lower", -build_index.vertical_before_plasma)
 
-    for index, item in enumerate(radial_build):
-        if item[0] == LayerType.PLASMA:
-            break
-        if item[0] == LayerType.GAP and radial_build[index + 1][0] == LayerType.PLASMA:
-            break
+    for item in radial_build[:build_index.plasma_index_radial]:
         if item[0] == LayerType.GAP:
             total_sum += item[1]
             continue
 
         layer_count += 1
-        # print('inner_radius', total_sum, 'item thickness', item[1], 'layer_count', layer_count)
         cylinder = center_column_shield_cylinder(
             inner_radius=total_sum,
             thickness=item[1],
             name=f"layer_{layer_count}",
             rotation_angle=rotation_angle,
             height=center_column_shield_height,
-            reference_point=("lower", -before),
+            reference_point=reference_point,
         )
         cylinders.append(cylinder)
         total_sum += item[1]
@@ -109,9 +182,11 @@ def spherical_tokamak_from_plasma(
         elongation: float = 2.0,
         triangularity: float = 0.55,
         rotation_angle: float = 180.0,
-        extra_cut_shapes: Sequence[cq.Workplane] = [],
-        extra_intersect_shapes: Sequence[cq.Workplane] = [],
-        colors: dict = {},
+        extra_cut_shapes: Sequence[cq.Workplane] = (),
+        extra_intersect_shapes: Sequence[cq.Workplane] = (),
+        colors: Optional[dict] = None,
+        fuzzy_value: Optional[float] = None,
+        intersect_against: Optional[cq.Workplane] = None,
 ) -> Assembly:
     """Creates a spherical tokamak fusion reactor from a radial build and plasma parameters.
 
@@ -123,18 +198,26 @@ def spherical_tokamak_from_plasma(
         elongation (float, optional): _description_. Defaults to 2.0.
         triangularity (float, optional): _description_. Defaults to 0.55.
         rotation_angle (Optional[str], optional): _description_. Defaults to 180.0.
-        extra_cut_shapes (Sequence, optional): _description_. Defaults to [].
-        colors (dict, optional): the colors to assign to the assembly parts. Defaults to {}.
+        extra_cut_shapes (Sequence, optional): _description_. Defaults to ().
+        colors (dict, optional): the colors to assign to the assembly parts. Defaults to None.
             Each dictionary entry should be a key that matches the assembly part name
             (e.g. 'plasma', or 'layer_1') and a tuple of 3 or 4 floats between 0 and 1
             representing the RGB or RGBA values.
+        fuzzy_value (float, optional): the fuzzy tolerance used when cutting
+            the extra shapes from the layers. Defaults to None which uses an
+            exact boolean operation.
+        intersect_against (cq.Workplane, optional): the shape that the
+            extra_intersect_shapes are intersected with. Defaults to None
+            which intersects them with the union of all the reactor layers.
+            Passing a simpler shape avoids building that union.
 
     Returns:
         _type_: _description_
     """
 
-    inner_equatorial_point = sum_up_to_plasma(radial_build)
-    plasma_radial_thickness = get_plasma_value(radial_build)
+    pi = get_plasma_index(radial_build)
+    inner_equatorial_point = sum(item[1] for item in radial_build[:pi])
+    plasma_radial_thickness = radial_build[pi][1]
     outer_equatorial_point = inner_equatorial_point + plasma_radial_thickness
 
     # sets major radius and minor radius from equatorial_points to allow a
@@ -144,7 +227,6 @@ def spherical_tokamak_from_plasma(
     minor_radius = major_radius - inner_equatorial_point
 
     # make vertical build from outer radial build
-    pi = get_plasma_index(radial_build)
     upper_vertical_build = radial_build[pi:]
 
     plasma_height = 2 * minor_radius * elongation
@@ -159,6 +241,8 @@ def spherical_tokamak_from_plasma(
         extra_cut_shapes=extra_cut_shapes,
         extra_intersect_shapes=extra_intersect_shapes,
         colors=colors,
+        fuzzy_value=fuzzy_value,
+        intersect_against=intersect_against,
     )
 
 
@@ -167,9 +251,11 @@ def spherical_tokamak(
         vertical_build: Sequence[Tuple[str, float]],
         triangularity: float = 0.55,
         rotation_angle: Optional[str] = 180.0,
-        extra_cut_shapes: Sequence[cq.Workplane] = [],
-        extra_intersect_shapes: Sequence[cq.Workplane] = [],
-        colors: dict = {},
+        extra_cut_shapes: Sequence[cq.Workplane] = (),
+        extra_intersect_shapes: Sequence[cq.Workplane] = (),
+        colors: Optional[dict] = None,
+        fuzzy_value: Optional[float] = None,
+        intersect_against: Optional[cq.Workplane] = None,
 ) -> Assembly:
     """  Creates a spherical tokamak fusion reactor from a radial build and vertical build.
 
@@ -180,19 +266,32 @@ def spherical_tokamak(
         elongation (float, optional): _description_. Defaults to 2.0.
         triangularity (float, optional): _description_. Defaults to 0.55.
         rotation_angle (Optional[str], optional): _description_. Defaults to 180.0.
-        extra_cut_shapes (Sequence, optional): _description_. Defaults to [].
-        colors (dict, optional): the colors to assign to the assembly parts. Defaults to {}.
+        extra_cut_shapes (Sequence, optional): _description_. Defaults to ().
+        colors (dict, optional): the colors to assign to the assembly parts. Defaults to None.
             Each dictionary entry should be a key that matches the assembly part name
             (e.g. 'plasma', or 'layer_1') and a tuple of 3 or 4 floats between 0 and 1
             representing the RGB or RGBA values.
+        fuzzy_value (float, optional): the fuzzy tolerance used when cutting
+            the extra shapes from the layers. Defaults to None which uses an
+            exact boolean operation.
+        intersect_against (cq.Workplane, optional): the shape that the
+            extra_intersect_shapes are intersected with. Defaults to None
+            which intersects them with the union of all the reactor layers.
+            Passing a simpler shape avoids building that union.
 
     Returns:
         _type_: _description_
     """
 
-    inner_equatorial_point = sum_up_to_plasma(radial_build)
-    plasma_radial_thickness = get_plasma_value(radial_build)
-    plasma_vertical_thickness = get_plasma_value(vertical_build)
+    colors = colors or {}
+    extra_cut_shapes = extra_cut_shapes or ()
+    extra_intersect_shapes = extra_intersect_shapes or ()
+
+    build_index = _build_index(radial_build, vertical_build)
+
+    inner_equatorial_point = build_index.sum_up_to_plasma
+    plasma_radial_thickness = build_index.plasma_radial_thickness
+    plasma_vertical_thickness = build_index.plasma_vertical_thickness
     outer_equatorial_point = inner_equatorial_point + plasma_radial_thickness
 
     # sets major radius and minor radius from equatorial_points to allow a
@@ -203,7 +302,7 @@ def spherical_tokamak(
 
     # vertical build
     elongation = (plasma_vertical_thickness / 2) / minor_radius
-    blanket_rear_wall_end_height = sum([item[1] for item in vertical_build])
+    blanket_rear_wall_end_height = build_index.total_height
 
     plasma = plasma_simplified(
         major_radius=major_radius,
@@ -217,11 +316,12 @@ def spherical_tokamak(
         radial_build=radial_build,
         vertical_build=vertical_build,
         rotation_angle=rotation_angle,
+        build_index=build_index,
     )
 
     blanket_cutting_cylinder = center_column_shield_cylinder(
         inner_radius=0,
-        thickness=sum_up_to_gap_before_plasma(radial_build),
+        thickness=build_index.sum_up_to_gap_before_plasma,
         rotation_angle=360,
         height=2 * blanket_rear_wall_end_height,
     )
@@ -235,69 +335,70 @@ def spherical_tokamak(
         elongation=elongation,
         rotation_angle=rotation_angle,
         center_column=blanket_cutting_cylinder,
+        build_index=build_index,
     )
 
     my_assembly = Assembly()
+    color_cache = {name: cq.Color(*rgb) for name, rgb in colors.items()}
 
     # adds extra cut shapes
     for i, entry in enumerate(extra_cut_shapes):
         if isinstance(entry, cq.Workplane):
             name = f"add_extra_cut_shape_{i + 1}"
-            my_assembly.add(entry, name=name, color=cq.Color(*colors.get(name, (0.5, 0.5, 0.5))))
+            add_to_assembly(my_assembly, entry, name, color_cache)
         else:
             raise ValueError(f"extra_cut_shapes should only contain cadquery Workplanes, not {type(entry)}")
 
+    # bounding boxes are found once and reused to skip boolean operations
+    # between shapes that can not overlap
+    layers = inner_radial_build + blanket_layers
+    layer_boxes = [bounding_box(layer) for layer in layers]
+
     # Builds intersect shapes
     intersect_shapes_to_cut = []
     if extra_intersect_shapes:
-        reactor_compound = inner_radial_build[0]
-        for entry in inner_radial_build[1:] + blanket_layers:
-            reactor_compound = reactor_compound.union(entry)
+        if intersect_against is None:
+            reactor_box = Bnd_Box()
+            for layer_box in layer_boxes:
+                reactor_box.Add(layer_box)
+        else:
+            reactor_box = bounding_box(intersect_against)
+
+        # the reactor union is only built once a shape needs it
+        reactor_compound = intersect_against
 
         for i, entry in enumerate(extra_intersect_shapes):
+            name = f"extra_intersect_shapes_{i + 1}"
+            if bounding_box(entry).IsOut(reactor_box):
+                # the intersection would be empty so the boolean is skipped and
+                # an empty part keeps the name in the assembly
+                add_to_assembly(my_assembly, cq.Compound.makeCompound([]), name, color_cache)
+                continue
+            if reactor_compound is None:
+                reactor_compound = union_workplanes(layers)
             reactor_entry_intersection = entry.intersect(reactor_compound)
             intersect_shapes_to_cut.append(reactor_entry_intersection)
-            name = f"extra_intersect_shapes_{i + 1}"
-            my_assembly.add(reactor_entry_intersection, name=name, color=cq.Color(*colors.get(name, (0.5, 0.5, 0.5))))
-
-    # Builsd core layers with cuts and track sub-shapes
-    shapes_and_components = []
-    if extra_cut_shapes or intersect_shapes_to_cut:
-        for i, entry in enumerate(inner_radial_build + blanket_layers):
-            combined_cutters = extra_cut_shapes + intersect_shapes_to_cut
-            for cutter in combined_cutters:
-                entry = entry.cut(cutter)
-
-            # Tracks sub-shapes created after cutting
-            if hasattr(entry, 'solids'):
-                solids_list = list(entry.solids())  # convert generator to list
-                if len(solids_list) > 1:
-                    for j, subentry in enumerate(solids_list):
-                        name = f"layer_{i + 1}_part_{j + 1}"
-                        my_assembly.add(
-                            subentry,
-                            name=name,
-                            color=cq.Color(*colors.get(name, (0.5, 0.5, 0.5)))
-                        )
-                else:
-                    name = f"layer_{i + 1}"
-                    my_assembly.add(
-                        solids_list[0] if solids_list else entry,
-                        name=name,
-                        color=cq.Color(*colors.get(name, (0.5, 0.5, 0.5)))
-                    )
-            else:
-                name = f"layer_{i + 1}"
-                my_assembly.add(entry, name=name, color=cq.Color(*colors.get(name, (0.5, 0.5, 0.5))))
-
-            shapes_and_components.append(entry)
-
-    else:
-        for i, entry in enumerate(inner_radial_build + blanket_layers):
+            add_to_assembly(my_assembly, reactor_entry_intersection, name, color_cache)
+
+    # Builds core layers with cuts and track sub-shapes
+    combined_cutters = [
+        (cutter, bounding_box(cutter)) for cutter in list(extra_cut_shapes) + intersect_shapes_to_cut
+    ]
+
+    for i, (layer, layer_box) in enumerate(zip(layers, layer_boxes)):
+        entry, _ = _cut_layer(layer, layer_box, combined_cutters, fuzzy_value)
+        # a layer made of several solids is added one part per solid
+        if count_solids(entry) > 1:
+            for j, subentry in enumerate(entry.solids().vals()):
+                name = f"layer_{i + 1}_part_{j + 1}"
+                add_to_assembly(my_assembly, subentry, name, color_cache)
+        else:
+            # the shape is added directly so the assembly does not have to
+            # unwrap the workplane
             name = f"layer_{i + 1}"
-            my_assembly.add(entry, name=name, color=cq.Color(*colors.get(name, (0.5, 0.5, 0.5))))
+            add_to_assembly(my_assembly, entry.val(), name, color_cache)
 
-    my_assembly.add(plasma, name="plasma", color=cq.Color(*colors.get("plasma", (0.5, 0.5, 0.5))))
+    add_to_assembly(my_assembly, plasma, "plasma", color_cache)
 
     # Stores tokamak parameters in the assembly for reference
     my_assembly.elongation = elongation
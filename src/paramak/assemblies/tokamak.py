@@ -1,61 +1,62 @@
+import math
 from typing import Sequence, Tuple
 
 import cadquery as cq
+import numpy as np
 from .assembly import Assembly
 
-from ..utils import get_plasma_index, LayerType
-from ..workplanes.blanket_from_plasma import blanket_from_plasma
+from ..utils import (
+    add_to_assembly,
+    bounding_box,
+    count_solids,
+    cumulative_offsets,
+    cut_workplane,
+    get_plasma_index,
+    intersect_workplane,
+    sort_by_proximity,
+    to_shape_list,
+    union_workplanes,
+    LayerType,
+)
+from ..workplanes.blanket_from_plasma import find_annulus_points, plasma_boundary
 from ..workplanes.center_column_shield_cylinder import center_column_shield_cylinder
 from ..workplanes.plasma_simplified import plasma_simplified
-from .spherical_tokamak import get_plasma_value, sum_up_to_plasma
 
 
-def count_cylinder_layers(radial_build):
-    before_plasma = 0
-    after_plasma = 0
+def create_center_column_shield_cylinders(radial_build, rotation_angle, center_column_shield_height):
+    # a single walk of the build finds the solids before the plasma and
+    # counts the solids after it, the inner solids without a matching outer
+    # solid become the center column cylinders
+    inner_solids = []
+    solids_after_plasma = 0
     found_plasma = False
+    total_sum = 0
 
     for item in radial_build:
         if item[0] == LayerType.PLASMA:
             found_plasma = True
-        elif item[0] == LayerType.SOLID:
-            if not found_plasma:
-                before_plasma += 1
-            else:
-                after_plasma += 1
-
-    return before_plasma - after_plasma
-
-
-def create_center_column_shield_cylinders(radial_build, rotation_angle, center_column_shield_height):
-    cylinders = []
-    total_sum = 0
-    layer_count = 0
-
-    number_of_cylinder_layers = count_cylinder_layers(radial_build)
-
-    for _, item in enumerate(radial_build):
-        if item[0] == LayerType.PLASMA:
-            break
-
-        if item[0] == LayerType.GAP:
+        elif found_plasma:
+            if item[0] == LayerType.SOLID:
+                solids_after_plasma += 1
+        elif item[0] == LayerType.GAP:
+            total_sum += item[1]
+        else:
+            inner_solids.append((total_sum, item[1]))
             total_sum += item[1]
-            continue
 
-        thickness = item[1]
-        layer_count += 1
-
-        if layer_count > number_of_cylinder_layers:
-            break
+    number_of_cylinder_layers = len(inner_solids) - solids_after_plasma
+    if number_of_cylinder_layers <= 0:
+        return []
 
+    cylinders = []
+    for layer_count, (inner_radius, thickness) in enumerate(inner_solids[:number_of_cylinder_layers], start=1):
         cylinder = center_column_shield_cylinder(
-            inner_radius=total_sum,
-            thickness=item[1],
+            inner_radius=inner_radius,
+            thickness=thickness,
             name=f"layer_{layer_count}",
             rotation_angle=rotation_angle,
             height=center_column_shield_height,
         )
-        total_sum += thickness
         cylinders.append(cylinder)
     return cylinders
 
@@ -69,87 +70,120 @@ def distance_to_plasma(radial_build, index):
     return distance
 
 
+def _layer_thicknesses(build, indexes):
+    # negative indexes wrap around to the end of the build, so an inner build
+    # with fewer entries than the outer build reuses the outermost entries
+    thicknesses = np.array([build[index][1] for index in indexes], dtype=float)
+    # the plasma is not a layer so it does not add to the offsets
+    thicknesses[0] = 0
+    return thicknesses
+
+
 def create_layers_from_plasma(
         radial_build, vertical_build, minor_radius, major_radius, triangularity, elongation, rotation_angle,
-        center_column
+        plasma_index_rb=None, plasma_index_vb=None
 ):
-    plasma_index_rb = get_plasma_index(radial_build)
-    plasma_index_vb = get_plasma_index(vertical_build)
+    if plasma_index_rb is None:
+        plasma_index_rb = get_plasma_index(radial_build)
+    if plasma_index_vb is None:
+        plasma_index_vb = get_plasma_index(vertical_build)
     indexes_from_plamsa_to_end = len(radial_build) - plasma_index_rb
     layers = []
 
-    cumulative_thickness_orb = 0
-    cumulative_thickness_irb = 0
-    cumulative_thickness_uvb = 0
-    cumulative_thickness_lvb = 0
-    for index_delta in range(indexes_from_plamsa_to_end):
+    # thicknesses of the build entries moving away from the plasma in each
+    # direction, index 0 is the plasma itself
+    index_deltas = np.arange(indexes_from_plamsa_to_end)
+    outer_thicknesses = _layer_thicknesses(radial_build, plasma_index_rb + index_deltas)
+    inner_thicknesses = _layer_thicknesses(radial_build, plasma_index_rb - index_deltas)
+    upper_thicknesses = _layer_thicknesses(vertical_build, plasma_index_vb - index_deltas)
+    lower_thicknesses = _layer_thicknesses(vertical_build, plasma_index_vb + index_deltas)
+
+    # every layer is offset from the same plasma boundary so it is sampled
+    # once, going from the top of the plasma past the inboard side, the bottom
+    # and the outboard side and back to the top
+    plasma_points = plasma_boundary(
+        np.linspace(-270, 90, num=100, endpoint=False),
+        major_radius=major_radius,
+        minor_radius=minor_radius,
+        triangularity=triangularity,
+        elongation=elongation,
+    )
+    # angles at which the upper, inner, lower, outer and again upper build
+    # values apply, the values are interpolated linearly in between
+    direction_angles = [-270, -180, -90, 0, 90]
+
+    # offset from the plasma to the start of each entry
+    cumulative_thicknesses_orb = cumulative_offsets(outer_thicknesses)
+    cumulative_thicknesses_irb = cumulative_offsets(inner_thicknesses)
+    cumulative_thicknesses_uvb = cumulative_offsets(upper_thicknesses)
+    cumulative_thicknesses_lvb = cumulative_offsets(lower_thicknesses)
+
+    # one row per entry with the values at each of the direction_angles
+    direction_thicknesses = np.column_stack(
+        (upper_thicknesses, inner_thicknesses, lower_thicknesses, outer_thicknesses, upper_thicknesses)
+    )
+    direction_offsets = np.column_stack(
+        (
+            cumulative_thicknesses_uvb,
+            cumulative_thicknesses_irb,
+            cumulative_thicknesses_lvb,
+            cumulative_thicknesses_orb,
+            cumulative_thicknesses_uvb,
+        )
+    )
 
-        if radial_build[plasma_index_rb + index_delta][0] == LayerType.PLASMA:
-            continue
-        outer_layer_thickness = radial_build[plasma_index_rb + index_delta][1]
-        inner_layer_thickness = radial_build[plasma_index_rb - index_delta][1]
-        upper_layer_thickness = vertical_build[plasma_index_vb - index_delta][1]
-        lower_layer_thickness = vertical_build[plasma_index_vb + index_delta][1]
-
-        if radial_build[plasma_index_rb + index_delta][0] == LayerType.GAP:
-            cumulative_thickness_orb += outer_layer_thickness
-            cumulative_thickness_irb += inner_layer_thickness
-            cumulative_thickness_uvb += upper_layer_thickness
-            cumulative_thickness_lvb += lower_layer_thickness
+    for item, layer_thicknesses, layer_offsets in zip(
+        radial_build[plasma_index_rb:], direction_thicknesses, direction_offsets
+    ):
+
+        if item[0] != LayerType.SOLID:
             continue
 
-        # build outer layer
-        if radial_build[plasma_index_rb + index_delta][0] == LayerType.SOLID:
-            outer_layer = blanket_from_plasma(
-                minor_radius=minor_radius,
-                major_radius=major_radius,
-                triangularity=triangularity,
-                elongation=elongation,
-                thickness=[upper_layer_thickness, outer_layer_thickness, lower_layer_thickness],
-                offset_from_plasma=[cumulative_thickness_uvb, cumulative_thickness_orb, cumulative_thickness_lvb],
-                start_angle=90,
-                stop_angle=-90,
-                rotation_angle=rotation_angle,
-                color=(0.5, 0.5, 0.5),
-                name=f"layer_{index_delta}",
-                allow_overlapping_shape=True,
-            )
-            inner_layer = blanket_from_plasma(
-                minor_radius=minor_radius,
-                major_radius=major_radius,
-                triangularity=triangularity,
-                elongation=elongation,
-                thickness=[
-                    lower_layer_thickness,
-                    inner_layer_thickness,
-                    upper_layer_thickness,
-                ],
-                offset_from_plasma=[
-                    cumulative_thickness_lvb,
-                    cumulative_thickness_irb,
-                    cumulative_thickness_uvb,
-                ],
-                start_angle=-90,
-                stop_angle=-270,
-                rotation_angle=rotation_angle,
-                color=(0.5, 0.5, 0.5),
-                name=f"layer_{index_delta}",
-                allow_overlapping_shape=True,
-            )
-            layer = outer_layer.union(inner_layer)
-            layers.append(layer)
-            # layers.append(inner_layer)
-        cumulative_thickness_orb += outer_layer_thickness
-        cumulative_thickness_irb += inner_layer_thickness
-        cumulative_thickness_uvb += upper_layer_thickness
-        cumulative_thickness_lvb += lower_layer_thickness
-        # build inner layer
-
-        # union layers
+        inner_points, outer_points = find_annulus_points(
+            offset_from_plasma=[direction_angles, layer_offsets.tolist()],
+            major_radius=major_radius,
+            minor_radius=minor_radius,
+            triangularity=triangularity,
+            elongation=elongation,
+            vertical_displacement=0.0,
+            thickness=[direction_angles, layer_thicknesses.tolist()],
+            allow_overlapping_shape=True,
+            plasma_points=plasma_points,
+        )
+        layer = _revolve_annulus(inner_points, outer_points, rotation_angle)
+        layers.append(layer)
 
     return layers
 
 
+def _revolve_annulus(inner_points, outer_points, rotation_angle):
+    # the layer profile is the area between two closed splines around the
+    # plasma, revolving it makes the whole layer without any boolean union
+    workplane = cq.Workplane("XZ")
+    for points in (outer_points, inner_points):
+        workplane = workplane.spline(
+            [(point[0], point[1]) for point in points], makeWire=True, tol=1e-1, periodic=True
+        )
+    return workplane.revolve(rotation_angle)
+
+
+def _build_reactor_compound(cylinders, blanket_layers):
+    # the cylinders share their radii and each blanket layer starts where the
+    # previous one ends so within each group the shapes only touch and can be
+    # glued. The blanket layers can reach into the cylinders so the two groups
+    # are fused normally. Sorting keeps neighbouring shapes together if a fuse
+    # falls back to pairwise unions
+    groups = []
+    for group in (cylinders, blanket_layers):
+        if len(group) == 1:
+            groups.append(group[0])
+        elif group:
+            groups.append(union_workplanes(sort_by_proximity(group), glue=True))
+    if len(groups) == 1:
+        return groups[0]
+    return union_workplanes(groups)
+
+
 def tokamak_from_plasma(
         radial_build: Sequence[Tuple[LayerType, float]],
         elongation: float = 2.0,
@@ -157,7 +191,8 @@ def tokamak_from_plasma(
         rotation_angle: float = 180.0,
         extra_cut_shapes=None,
         extra_intersect_shapes=None,
-        colors=None
+        colors=None,
+        reactor_compound_cache=None,
 ) -> Assembly:
     """
     Creates a tokamak fusion reactor from a radial build and plasma parameters.
@@ -167,13 +202,19 @@ def tokamak_from_plasma(
             reactor. Each tuple should contain a LayerType and a float
         elongation: The elongation of the plasma. Defaults to 2.0.
         triangularity: The triangularity of the plasma. Defaults to 0.55.
-        rotation_angle: The rotation angle of the plasma. Defaults to 180.0.
+        rotation_angle: The rotation angle of the plasma. Angles above 360 are
+            revolved a full turn. Defaults to 180.0.
         extra_cut_shapes: A list of extra shapes to cut the reactor with. Defaults to [].
         extra_intersect_shapes: A list of extra shapes to intersect the reactor with. Defaults to [].
         colors (dict, optional): the colors to assign to the assembly parts. Defaults to {}.
             Each dictionary entry should be a key that matches the assembly part name
             (e.g. 'plasma', or 'layer_1') and a tuple of 3 or 4 floats between 0 and 1
             representing the RGB or RGBA values.
+        reactor_compound_cache (dict, optional): a dictionary to store the fused
+            reactor used by the extra intersect shapes in. Passing the same
+            dictionary to repeated calls reuses the fused reactor when the
+            builds, triangularity and rotation angle are unchanged. Defaults to
+            None which fuses the reactor on every call.
 
     Returns:
         CadQuery.Assembly: A CadQuery Assembly object representing the tokamak fusion reactor.
@@ -185,8 +226,11 @@ def tokamak_from_plasma(
         extra_intersect_shapes = []
     if extra_cut_shapes is None:
         extra_cut_shapes = []
-    inner_equatorial_point = sum_up_to_plasma(radial_build)
-    plasma_radial_thickness = get_plasma_value(radial_build)
+    # the vertical build is made by concatenating slices of the radial build
+    radial_build = tuple(tuple(item) for item in radial_build)
+    pi = get_plasma_index(radial_build)
+    inner_equatorial_point = sum(item[1] for item in radial_build[:pi])
+    plasma_radial_thickness = radial_build[pi][1]
     outer_equatorial_point = inner_equatorial_point + plasma_radial_thickness
 
     # sets major radius and minor radius from equatorial_points to allow a
@@ -196,13 +240,12 @@ def tokamak_from_plasma(
     minor_radius = major_radius - inner_equatorial_point
 
     # make vertical build from inner radial build
-    pi = get_plasma_index(radial_build)
     rbi = len(radial_build) - 1 - pi  # number of unique entries in outer or inner radial build
-    upper_vertical_build = radial_build[pi - rbi: pi][::-1]  # get the inner radial build
+    inner_radial_build = radial_build[pi - rbi: pi]  # get the inner radial build
 
     plasma_height = 2 * minor_radius * elongation
-    # slice opperation reverses the list and removes the last value to avoid two plasmas
-    vertical_build = upper_vertical_build[::-1] + [(LayerType.PLASMA, plasma_height)] + upper_vertical_build
+    # the lower half matches the inner radial build and the upper half mirrors it
+    vertical_build = inner_radial_build + ((LayerType.PLASMA, plasma_height),) + inner_radial_build[::-1]
 
     return tokamak(
         radial_build=radial_build,
@@ -211,7 +254,8 @@ def tokamak_from_plasma(
         rotation_angle=rotation_angle,
         extra_cut_shapes=extra_cut_shapes,
         extra_intersect_shapes=extra_intersect_shapes,
-        colors=colors
+        colors=colors,
+        reactor_compound_cache=reactor_compound_cache,
     )
 
 
@@ -222,7 +266,8 @@ def tokamak(
         rotation_angle: float = 180.0,
         extra_cut_shapes=None,
         extra_intersect_shapes=None,
-        colors=None
+        colors=None,
+        reactor_compound_cache=None,
 ) -> Assembly:
     """
     Creates a tokamak fusion reactor from a radial and vertical build.
@@ -233,34 +278,49 @@ def tokamak(
         vertical_build: sequence of tuples containing the vertical build of the
             reactor. Each tuple should contain a LayerType and a float 
         triangularity: The triangularity of the plasma. Defaults to 0.55.
-        rotation_angle: The rotation angle of the plasma. Defaults to 180.0.
+        rotation_angle: The rotation angle of the plasma. Angles above 360 are
+            revolved a full turn. Defaults to 180.0.
         extra_cut_shapes: A list of extra shapes to cut the reactor with. Defaults to [].
         extra_intersect_shapes: A list of extra shapes to intersect the reactor with. Defaults to [].
         colors (dict, optional): the colors to assign to the assembly parts. Defaults to {}.
             Each dictionary entry should be a key that matches the assembly part name
             (e.g. 'plasma', or 'layer_1') and a tuple of 3 or 4 floats between 0 and 1
             representing the RGB or RGBA values.
+        reactor_compound_cache (dict, optional): a dictionary to store the fused
+            reactor used by the extra intersect shapes in. Passing the same
+            dictionary to repeated calls reuses the fused reactor when the
+            builds, triangularity and rotation angle are unchanged. Defaults to
+            None which fuses the reactor on every call.
 
     Returns:
         CadQuery.Assembly: A CadQuery Assembly object representing the tokamak fusion reactor.
     """
 
+    # a full turn closes every part on itself, a larger angle would make the
+    # parts overlap themselves
+    rotation_angle = min(rotation_angle, 360.0)
     if colors is None:
         colors = {}
     if extra_intersect_shapes is None:
         extra_intersect_shapes = []
     if extra_cut_shapes is None:
         extra_cut_shapes = []
-    inner_equatorial_point = sum_up_to_plasma(radial_build)
-    plasma_radial_thickness = get_plasma_value(radial_build)
-    plasma_vertical_thickness = get_plasma_value(vertical_build)
+    # hashable builds can be used as reactor_compound_cache keys
+    radial_build = tuple(tuple(item) for item in radial_build)
+    vertical_build = tuple(tuple(item) for item in vertical_build)
+    # the plasma is found once in each build and the index passed on
+    plasma_index_rb = get_plasma_index(radial_build)
+    plasma_index_vb = get_plasma_index(vertical_build)
+    inner_equatorial_point = sum(item[1] for item in radial_build[:plasma_index_rb])
+    plasma_radial_thickness = radial_build[plasma_index_rb][1]
+    plasma_vertical_thickness = vertical_build[plasma_index_vb][1]
     outer_equatorial_point = inner_equatorial_point + plasma_radial_thickness
 
     major_radius = (outer_equatorial_point + inner_equatorial_point) / 2
     minor_radius = major_radius - inner_equatorial_point
 
     elongation = (plasma_vertical_thickness / 2) / minor_radius
-    blanket_rear_wall_end_height = sum([item[1] for item in vertical_build])
+    blanket_rear_wall_end_height = math.fsum(item[1] for item in vertical_build)
 
     plasma = plasma_simplified(
         major_radius=major_radius,
@@ -282,69 +342,64 @@ def tokamak(
         triangularity=triangularity,
         elongation=elongation,
         rotation_angle=rotation_angle,
-        center_column=inner_radial_build[0],  # blanket_cutting_cylinder,
+        plasma_index_rb=plasma_index_rb,
+        plasma_index_vb=plasma_index_vb,
     )
 
     my_assembly = Assembly()
+    color_cache = {name: cq.Color(*rgb) for name, rgb in colors.items()}
 
     for i, entry in enumerate(extra_cut_shapes):
         if isinstance(entry, cq.Workplane):
             name = f"add_extra_cut_shape_{i + 1}"
-            my_assembly.add(entry, name=name, color=cq.Color(*colors.get(name, (0.5, 0.5, 0.5))))
+            add_to_assembly(my_assembly, entry, name, color_cache)
         else:
             raise ValueError(f"extra_cut_shapes should only contain cadquery Workplanes, not {type(entry)}")
 
     # builds up the intersect shapes
     intersect_shapes_to_cut = []
     if len(extra_intersect_shapes) > 0:
-        all_shapes = []
-        for shape in inner_radial_build + blanket_layers:
-            all_shapes.append(shape)
-
         # makes a union of the the radial build to use as a base for the intersect shapes
-        reactor_compound = inner_radial_build[0]
-        for i, entry in enumerate(inner_radial_build[1:] + blanket_layers):
-            reactor_compound = reactor_compound.union(entry)
+        # the fused reactor only depends on these arguments so can be reused
+        cache_key = (radial_build, vertical_build, triangularity, rotation_angle)
+        if reactor_compound_cache is not None and cache_key in reactor_compound_cache:
+            reactor_compound = reactor_compound_cache[cache_key]
+        else:
+            reactor_compound = _build_reactor_compound(inner_radial_build, blanket_layers)
+            if reactor_compound_cache is not None:
+                reactor_compound_cache[cache_key] = reactor_compound
+        reactor_tools = to_shape_list([reactor_compound])
 
         # adds the extra intersect shapes to the assembly
         for i, entry in enumerate(extra_intersect_shapes):
-            reactor_entry_intersection = entry.intersect(reactor_compound)
+            reactor_entry_intersection = intersect_workplane(entry, reactor_tools)
             intersect_shapes_to_cut.append(reactor_entry_intersection)
             name = f"extra_intersect_shapes_{i + 1}"
-            my_assembly.add(reactor_entry_intersection, name=name, color=cq.Color(*colors.get(name, (0.5, 0.5, 0.5))))
-
-            shapes_and_components = []
-            if extra_cut_shapes or intersect_shapes_to_cut:
-                for i, entry in enumerate(inner_radial_build + blanket_layers):
-                    combined_cutters = extra_cut_shapes + intersect_shapes_to_cut
-                    if combined_cutters:
-                        # Cut the entry with all cutters
-                        for cutter in combined_cutters:
-                            entry = entry.cut(cutter)
-
-                # Handle sub-shapes after cuts or intersections
-                if hasattr(entry, 'solids'):
-                    solids_list = list(entry.solids())  # convert generator to list
-                    if len(solids_list) > 1:
-                        for j, subentry in enumerate(solids_list):
-                            name = f"layer_{i + 1}_part_{j + 1}"
-                            my_assembly.add(
-                                subentry,
-                                name=name,
-                                color=cq.Color(*colors.get(name, (0.5, 0.5, 0.5)))
-                            )
-                    else:
-                        name = f"layer_{i + 1}"
-                        my_assembly.add(
-                            solids_list[0] if solids_list else entry,
-                            name=name,
-                            color=cq.Color(*colors.get(name, (0.5, 0.5, 0.5)))
-                        )
-                else:
-                    name = f"layer_{i + 1}"
-                    my_assembly.add(entry, name=name, color=cq.Color(*colors.get(name, (0.5, 0.5, 0.5))))
-
-                shapes_and_components.append(entry)
+            add_to_assembly(my_assembly, reactor_entry_intersection, name, color_cache)
+
+    # cuts each layer once, after all the cutters are known
+    combined_cutters = list(extra_cut_shapes) + intersect_shapes_to_cut
+    cutter_boxes = [(cutter, bounding_box(cutter)) for cutter in combined_cutters]
+
+    for i, entry in enumerate(inner_radial_build + blanket_layers):
+        if cutter_boxes:
+            # cutters that can not overlap the entry are skipped
+            entry_box = bounding_box(entry)
+            overlapping_cutters = [cutter for cutter, cutter_box in cutter_boxes if not entry_box.IsOut(cutter_box)]
+            if overlapping_cutters:
+                # Cut the entry with all cutters in one parallel boolean operation
+                entry = cut_workplane(entry, to_shape_list(overlapping_cutters))
+
+        # Handle sub-shapes after cuts or intersections
+        if count_solids(entry) > 1:
+            for j, subentry in enumerate(entry.val().Solids()):
+                name = f"layer_{i + 1}_part_{j + 1}"
+                add_to_assembly(my_assembly, subentry, name, color_cache)
+        else:
+            # the shape is added directly so the assembly does not have to
+            # unwrap the workplane
+            name = f"layer_{i + 1}"
+            add_to_assembly(my_assembly, entry.val(), name, color_cache)
 
     # Stores tokamak parameters in the assembly for reference
     my_assembly.elongation = elongation
@@ -1,7 +1,16 @@
 import typing
 from enum import Enum
 
-from cadquery import Workplane
+import numpy as np
+from cadquery import Color, Shape, Workplane
+from OCP.BOPAlgo import BOPAlgo_GlueEnum
+from OCP.Bnd import Bnd_Box
+from OCP.BRepAlgoAPI import BRepAlgoAPI_Common, BRepAlgoAPI_Cut, BRepAlgoAPI_Fuse
+from OCP.BRepBndLib import BRepBndLib
+from OCP.BRepCheck import BRepCheck_Analyzer
+from OCP.TopAbs import TopAbs_SOLID
+from OCP.TopExp import TopExp_Explorer
+from OCP.TopTools import TopTools_ListOfShape
 
 
 class LayerType(Enum):
@@ -105,6 +114,230 @@ def rotate_solid(angles: typing.Sequence[float], solid: Workplane) -> Workplane:
     return solid
 
 
+def to_shape_list(workplanes: typing.Sequence[Workplane]) -> TopTools_ListOfShape:
+    """Collects the solids of the workplanes into an OCCT list of shapes that
+    can be passed to boolean operations. The list can be built once and reused
+    when the same tools are used for several boolean operations.
+
+    Args:
+        workplanes: the workplanes to collect the solids from.
+
+    Returns:
+        TopTools_ListOfShape: the list of shapes.
+    """
+    shape_list = TopTools_ListOfShape()
+    for workplane in workplanes:
+        for shape in workplane.vals():
+            if isinstance(shape, Shape):
+                shape_list.Append(shape.wrapped)
+    return shape_list
+
+
+def _boolean(operation, arguments, tools, workplane, glue=False):
+    operation.SetArguments(arguments)
+    operation.SetTools(tools)
+    operation.SetRunParallel(True)
+    # the history of the modified sub-shapes is never used
+    operation.SetToFillHistory(False)
+    if glue:
+        operation.SetGlue(BOPAlgo_GlueEnum.BOPAlgo_GlueShift)
+    operation.Build()
+    if not operation.IsDone():
+        raise ValueError(f"The boolean operation {type(operation).__name__} failed")
+
+    return workplane.newObject([Shape.cast(operation.Shape()).clean()])
+
+
+def union_workplanes(workplanes: typing.Sequence[Workplane], glue: bool = False) -> Workplane:
+    """Fuses the solids of all the workplanes together with a single OCCT
+    boolean operation. This is equivalent to repeatedly calling .union() but
+    lets OCCT find all the intersections at once and in parallel.
+
+    Args:
+        workplanes: the workplanes to fuse together.
+        glue: if True the OCCT gluing option is used, which skips most of the
+            intersection work. Only use this when the shapes touch but do not
+            overlap, for example concentric layers. OCCT does not report an
+            error when glued shapes overlap, so the glued solid is checked and
+            the shapes are fused without gluing if it is invalid or its volume
+            differs from the total volume of the shapes.
+
+    Returns:
+        Workplane: a workplane containing the fused solid.
+    """
+    try:
+        fused = _boolean(
+            BRepAlgoAPI_Fuse(),
+            to_shape_list(workplanes[:1]),
+            to_shape_list(workplanes[1:]),
+            workplanes[0],
+            glue=glue,
+        )
+    except ValueError:
+        # pairwise unions are slower but each one is a simpler problem for OCCT
+        return balanced_union(workplanes)
+
+    if glue and not _is_glued_union(fused, workplanes):
+        return union_workplanes(workplanes)
+    return fused
+
+
+def _is_glued_union(fused, workplanes, rel_tol=1e-4):
+    # shapes that only touch keep their full volume when fused together
+    fused_shape = fused.val()
+    if not BRepCheck_Analyzer(fused_shape.wrapped).IsValid():
+        return False
+    total_volume = sum(
+        shape.Volume() for workplane in workplanes for shape in workplane.vals() if isinstance(shape, Shape)
+    )
+    return abs(fused_shape.Volume() - total_volume) <= rel_tol * abs(total_volume)
+
+
+def balanced_union(workplanes: typing.Sequence[Workplane], glue: bool = False) -> Workplane:
+    """Unions the workplanes pairwise in a balanced tree. Shapes of similar
+    size are unioned together which is cheaper than repeatedly unioning small
+    shapes into one growing shape.
+
+    Args:
+        workplanes: the workplanes to union together.
+        glue: if True each pair is fused with the OCCT gluing option, see
+            union_workplanes.
+
+    Returns:
+        Workplane: a workplane containing the unioned solid.
+    """
+    parts = list(workplanes)
+    while len(parts) > 1:
+        if glue:
+            unioned = [union_workplanes([a, b], glue=True) for a, b in zip(parts[0::2], parts[1::2])]
+        else:
+            unioned = [a.union(b) for a, b in zip(parts[0::2], parts[1::2])]
+        if len(parts) % 2:
+            unioned.append(parts[-1])
+        parts = unioned
+    return parts[0]
+
+
+def cut_workplane(workplane: Workplane, tools: TopTools_ListOfShape) -> Workplane:
+    """Cuts the tools from the solid of the workplane. This is equivalent to
+    workplane.cut() but accepts the tools as a prebuilt list of shapes so the
+    same tools can be reused for many cuts.
+
+    Args:
+        workplane: the workplane to cut.
+        tools: the shapes to cut away, see to_shape_list.
+
+    Returns:
+        Workplane: a workplane containing the cut solid.
+    """
+    return _boolean(BRepAlgoAPI_Cut(), to_shape_list([workplane]), tools, workplane)
+
+
+def intersect_workplane(workplane: Workplane, tools: TopTools_ListOfShape) -> Workplane:
+    """Intersects the solid of the workplane with the tools. This is
+    equivalent to workplane.intersect() but runs in parallel and accepts the
+    tools as a prebuilt list of shapes so the same tools can be reused for
+    many intersections.
+
+    Args:
+        workplane: the workplane to intersect.
+        tools: the shapes to intersect with, see to_shape_list.
+
+    Returns:
+        Workplane: a workplane containing the common solid.
+    """
+    return _boolean(BRepAlgoAPI_Common(), to_shape_list([workplane]), tools, workplane)
+
+
+def bounding_box(workplane: Workplane) -> Bnd_Box:
+    """Finds the OCCT bounding box of all the shapes of the workplane. The box
+    can be used with Bnd_Box.IsOut to cheaply check if two shapes might overlap
+    before running a boolean operation.
+
+    Args:
+        workplane: the workplane to find the bounding box of.
+
+    Returns:
+        Bnd_Box: the bounding box.
+    """
+    box = Bnd_Box()
+    for shape in workplane.vals():
+        if isinstance(shape, Shape):
+            BRepBndLib.Add_s(shape.wrapped, box)
+    return box
+
+
+def sort_by_proximity(workplanes: typing.Sequence[Workplane]) -> typing.List[Workplane]:
+    """Sorts the workplanes by the position of their bounding box centres so
+    that neighbouring shapes end up next to each other. Unioning the sorted
+    list with balanced_union keeps each pairwise union between shapes that are
+    close together. The shapes are rotated around the Z axis so the centres are
+    ordered by their distance from the axis and then by height.
+
+    Args:
+        workplanes: the workplanes to sort.
+
+    Returns:
+        list: the sorted workplanes.
+    """
+
+    def centre_key(workplane):
+        xmin, ymin, zmin, xmax, ymax, zmax = bounding_box(workplane).Get()
+        centre_x, centre_y, centre_z = (xmin + xmax) / 2, (ymin + ymax) / 2, (zmin + zmax) / 2
+        return (centre_x**2 + centre_y**2, centre_z)
+
+    return sorted(workplanes, key=centre_key)
+
+
+def count_solids(workplane: Workplane, limit: int = 2) -> int:
+    """Counts the solids in the workplane without creating a python object for
+    each solid. Counting stops once limit solids have been found.
+
+    Args:
+        workplane: the workplane to count the solids of.
+        limit: the maximum number of solids to count.
+
+    Returns:
+        int: the number of solids found, up to limit.
+    """
+    explorer = TopExp_Explorer(workplane.val().wrapped, TopAbs_SOLID)
+    count = 0
+    while explorer.More() and count < limit:
+        count += 1
+        explorer.Next()
+    return count
+
+
+# parts without a color in the colors dictionary share one color object
+_DEFAULT_COLOR = Color(0.5, 0.5, 0.5)
+
+
+def add_to_assembly(assembly, shape, name: str, color_cache: dict):
+    """Adds the shape to the assembly with its color from color_cache, or the
+    shared default grey if the name has no color.
+
+    Args:
+        assembly: the assembly to add the shape to.
+        shape: the Workplane or Shape to add.
+        name: the name of the part in the assembly.
+        color_cache: cadquery Colors for the part names that have a color.
+    """
+    assembly.add(shape, name=name, color=color_cache.get(name, _DEFAULT_COLOR))
+
+
+def cumulative_offsets(thicknesses) -> np.ndarray:
+    """Finds the offset of each entry from the start of the build, which is
+    the total thickness of all the entries before it.
+
+    Args:
+        thicknesses: the thickness of each entry.
+
+    Returns:
+        np.ndarray: the offset of each entry.
+    """
+    return np.concatenate(([0.0], np.cumsum(thicknesses)[:-1]))
+
+
 def sum_up_to_gap_before_plasma(radial_build):
     total_sum = 0
     for i, item in enumerate(radial_build):
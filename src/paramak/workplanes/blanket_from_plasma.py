@@ -4,9 +4,18 @@ import typing
 from ..utils import create_wire_workplane_from_points
 import mpmath
 import numpy as np
-import sympy as sp
 from scipy.interpolate import interp1d
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional, without it the profile runs as plain NumPy
+
+    def njit(*args, **kwargs):
+        def decorator(function):
+            return function
+
+        return decorator
+
 
 def make_callable(attribute, start_angle, stop_angle):
     """This function transforms an attribute (thickness or offset) into a
@@ -55,9 +64,12 @@ def find_points(
     num_points,
     allow_overlapping_shape,
     angles=None,
+    plasma_points=None,
 ):
     # create array of angles theta
-    if angles is None:
+    if plasma_points is not None:
+        thetas = plasma_points[:, 0]
+    elif angles is None:
         thetas = np.linspace(
             start_angle,
             stop_angle,
@@ -77,6 +89,7 @@ def find_points(
         vertical_displacement=vertical_displacement,
         thetas=thetas,
         offset=inner_offset,
+        boundary=plasma_points,
     )
     inner_points[-1][2] = "straight"
 
@@ -94,6 +107,7 @@ def find_points(
         vertical_displacement=vertical_displacement,
         thetas=np.flip(thetas),
         offset=outer_offset,
+        boundary=None if plasma_points is None else plasma_points[::-1],
     )
 
     outer_points[-1][2] = "straight"
@@ -114,6 +128,68 @@ def find_points(
     return points
 
 
+def find_annulus_points(
+    offset_from_plasma,
+    major_radius,
+    minor_radius,
+    triangularity,
+    elongation,
+    vertical_displacement,
+    thickness,
+    allow_overlapping_shape,
+    plasma_points,
+):
+    """Finds the points of the two closed curves either side of a blanket that
+    goes all the way around the plasma. Unlike find_points the curves are not
+    joined so they can be used as the outer and inner wire of one face.
+
+    Args:
+        plasma_points (np.array): the plasma boundary as returned by
+            plasma_boundary, sampled once around the plasma without repeating
+            the first angle.
+
+    Returns:
+        (list, list): the inner and outer points [[R1, Z1, connection1], ...]
+    """
+    thetas = plasma_points[:, 0]
+
+    # create inner points
+    inner_offset = make_callable(offset_from_plasma, thetas[0], thetas[-1])
+    inner_points, inner_overlapping_shape = create_offset_points(
+        major_radius=major_radius,
+        minor_radius=minor_radius,
+        triangularity=triangularity,
+        elongation=elongation,
+        vertical_displacement=vertical_displacement,
+        thetas=thetas,
+        offset=inner_offset,
+        boundary=plasma_points,
+    )
+
+    # create outer points
+    thickness = make_callable(thickness, thetas[0], thetas[-1])
+
+    def outer_offset(theta):
+        return inner_offset(theta) + thickness(theta)
+
+    outer_points, outer_overlapping_shape = create_offset_points(
+        major_radius=major_radius,
+        minor_radius=minor_radius,
+        triangularity=triangularity,
+        elongation=elongation,
+        vertical_displacement=vertical_displacement,
+        thetas=thetas,
+        offset=outer_offset,
+        boundary=plasma_points,
+    )
+
+    if (inner_overlapping_shape or outer_overlapping_shape) and allow_overlapping_shape is False:
+        msg = "blanket_from_plasma: Some points with negative R coordinate have " "been ignored."
+        warnings.warn(msg, category=UserWarning)
+
+    return inner_points, outer_points
+
+
 def create_offset_points(
     major_radius: float,
     minor_radius: float,
@@ -122,6 +198,7 @@ def create_offset_points(
     vertical_displacement,
     thetas,
     offset,
+    boundary=None,
 ):
     """generates a list of points following parametric equations with an
     offset
@@ -130,84 +207,104 @@ def create_offset_points(
         thetas (np.array): the angles in degrees.
         offset (callable): offset value (cm). offset=0 will follow the
             parametric equations.
+        boundary (np.array, optional): the plasma boundary at thetas as
+            returned by plasma_boundary. Defaults to None which calculates it.
 
     Returns:
         list: list of points [[R1, Z1, connection1], [R2, Z2, connection2],
         ...]
     """
-    # create sympy objects and derivatives
-
-    overlapping_shape = False
-    theta_sp = sp.Symbol("theta")
-
-    R_sp, Z_sp = distribution(
-        major_radius,
-        minor_radius,
-        triangularity,
-        elongation,
-        vertical_displacement,
-        theta_sp,
-        pkg=sp,
-    )
-    R_derivative = sp.diff(R_sp, theta_sp)
-    Z_derivative = sp.diff(Z_sp, theta_sp)
-    points = []
-
-    for theta in thetas:
-        # get local value of derivatives
-        val_R_derivative = float(R_derivative.subs("theta", float(theta)).evalf())
-        val_Z_derivative = float(Z_derivative.subs("theta", float(theta)).evalf())
-
-        # get normal vector components
-        nx = val_Z_derivative
-        ny = -val_R_derivative
-
-        # normalise normal vector
-        normal_vector_norm = (nx**2 + ny**2) ** 0.5
-        nx /= normal_vector_norm
-        ny /= normal_vector_norm
-
-        # calculate outer points
-        val_R_outer = (
-            distribution(
-                major_radius,
-                minor_radius,
-                triangularity,
-                elongation,
-                vertical_displacement,
-                theta,
-            )[0]
-            + offset(theta) * nx
+    if boundary is None:
+        boundary = plasma_boundary(
+            thetas, major_radius, minor_radius, triangularity, elongation, vertical_displacement
         )
-        val_Z_outer = (
-            distribution(
-                major_radius,
-                minor_radius,
-                triangularity,
-                elongation,
-                vertical_displacement,
-                theta,
-            )[1]
-            + offset(theta) * ny
-        )
-        if float(val_R_outer) > 0:
-            points.append([float(val_R_outer), float(val_Z_outer), "spline"])
-        else:
-            overlapping_shape = True
+    thetas = boundary[:, 0]
+
+    # offsets that only accept a single angle are evaluated one at a time
+    try:
+        offsets = np.array(np.broadcast_to(offset(thetas), thetas.shape), dtype=float)
+    except (TypeError, ValueError):
+        offsets = np.array([offset(theta) for theta in thetas], dtype=float)
+
+    # moves the boundary points along the normal
+    val_R_outer = boundary[:, 1] + offsets * boundary[:, 3]
+    val_Z_outer = boundary[:, 2] + offsets * boundary[:, 4]
+
+    inside = val_R_outer > 0
+    overlapping_shape = not inside.all()
+    points = [
+        [R_point, Z_point, "spline"]
+        for R_point, Z_point in zip(val_R_outer[inside].tolist(), val_Z_outer[inside].tolist())
+    ]
     return points, overlapping_shape
 
 
+def plasma_boundary(
+    thetas,
+    major_radius: float = 450.0,
+    minor_radius: float = 150.0,
+    triangularity: float = 0.55,
+    elongation: float = 2.0,
+    vertical_displacement: float = 0.0,
+):
+    """Samples the plasma boundary and its outward normal. The result only
+    depends on the plasma parameters so it can be calculated once and passed
+    to blanket_from_plasma for each blanket around the same plasma.
+
+    Args:
+        thetas (np.array): the angles in degrees.
+
+    Returns:
+        np.array: array of shape (n, 5) with the columns theta, R, Z and the
+        R and Z components of the unit normal.
+    """
+    return _plasma_boundary(
+        np.asarray(thetas, dtype=float),
+        float(major_radius),
+        float(minor_radius),
+        float(triangularity),
+        float(elongation),
+        float(vertical_displacement),
+    )
+
+
+@njit(cache=True)
+def _plasma_boundary(thetas, major_radius, minor_radius, triangularity, elongation, vertical_displacement):
+    # JIT compiled when numba is installed, otherwise runs as plain NumPy
+    thetas_rad = np.radians(thetas)
+
+    # derivatives of the parametric equations. Only the direction is needed
+    # so the degrees to radians factor is left out
+    R_derivative = (
+        -minor_radius
+        * np.sin(thetas_rad + triangularity * np.sin(thetas_rad))
+        * (1 + triangularity * np.cos(thetas_rad))
+    )
+    Z_derivative = elongation * minor_radius * np.cos(thetas_rad)
+
+    # normal vector components, normalised
+    normal_vector_norm = np.sqrt(Z_derivative**2 + R_derivative**2)
+
+    boundary = np.empty((thetas.shape[0], 5))
+    boundary[:, 0] = thetas
+    boundary[:, 1] = major_radius + minor_radius * np.cos(thetas_rad + triangularity * np.sin(thetas_rad))
+    boundary[:, 2] = elongation * minor_radius * np.sin(thetas_rad) + vertical_displacement
+    boundary[:, 3] = Z_derivative / normal_vector_norm
+    boundary[:, 4] = -R_derivative / normal_vector_norm
+    return boundary
+
+
 def distribution(major_radius, minor_radius, triangularity, elongation, vertical_displacement, theta, pkg=np):
     """Plasma distribution theta in degrees
 
     Args:
-        theta (float or np.array or sp.Symbol): the angle(s) in degrees.
-        pkg (module, optional): Module to use in the funciton. If sp, as
-            sympy object will be returned. If np, a np.array or a float
+        theta (float or np.array): the angle(s) in degrees.
+        pkg (module, optional): Module to use in the funciton. If mpmath,
+            mpmath numbers will be returned. If np, a np.array or a float
             will be returned. Defaults to np.
 
     Returns:
-        (float, float) or (sympy.Add, sympy.Mul) or
+        (float, float) or (mpmath.mpf, mpmath.mpf) or
             (numpy.array, numpy.array): The R and Z coordinates of the
             point with angle theta
     """
@@ -244,6 +341,8 @@ def blanket_from_plasma(
     allow_overlapping_shape=False,
     connect_to_center=False,
     create_solid: bool = True,
+    sample_angles=None,
+    plasma_points=None,
 ):
     """A blanket volume created from plasma parameters. In might be nessecary
     to increase the num_points when making long but thin geometry with this
@@ -277,6 +376,16 @@ def blanket_from_plasma(
         num_points: number of points that will describe the shape.
         allow_overlapping_shape: allows parameters to create a shape that
             overlaps itself.
+        sample_angles: the angles in degrees at which the shape is sampled.
+            Defaults to None which uses num_points angles evenly spaced
+            between start_angle and stop_angle. Passing precomputed angles
+            avoids recreating them when making many blankets.
+        plasma_points: the plasma boundary as returned by plasma_boundary.
+            Defaults to None which samples the boundary from the plasma
+            parameters. When given, its angles are used instead of
+            sample_angles and it must have been made with the same plasma
+            parameters, this avoids resampling the same plasma for each
+            blanket.
     """
 
     points = find_points(
@@ -292,6 +401,8 @@ def blanket_from_plasma(
         num_points=num_points,
         allow_overlapping_shape=allow_overlapping_shape,
         connect_to_center=connect_to_center,
+        angles=sample_angles,
+        plasma_points=plasma_points,
     )
     points.append(points[0])
 
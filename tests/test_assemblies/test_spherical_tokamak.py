@@ -1,5 +1,6 @@
 from pathlib import Path
 
+import cadquery as cq
 import pytest
 
 import paramak
@@ -157,4 +158,78 @@ def test_attributes():
     assert my_reactor.elongation == 2
     assert my_reactor.triangularity == 0.55
     assert my_reactor.major_radius == 275
-    assert my_reactor.minor_radius == 150
\ No newline at end of file
+    assert my_reactor.minor_radius == 150
+
+
+def _spherical_tokamak(**kwargs):
+    return paramak.spherical_tokamak_from_plasma(
+        radial_build=[
+            (paramak.LayerType.GAP, 10),
+            (paramak.LayerType.SOLID, 50),
+            (paramak.LayerType.SOLID, 15),
+            (paramak.LayerType.GAP, 50),
+            (paramak.LayerType.PLASMA, 300),
+            (paramak.LayerType.GAP, 60),
+            (paramak.LayerType.SOLID, 15),
+            (paramak.LayerType.SOLID, 60),
+            (paramak.LayerType.SOLID, 10),
+        ],
+        elongation=2,
+        triangularity=0.55,
+        rotation_angle=180,
+        **kwargs,
+    )
+
+
+def _part(reactor, name):
+    for part in reactor:
+        if part[1].split("/")[-1] == name:
+            return part[0]
+    raise KeyError(name)
+
+
+def _divertor():
+    points = [(150, -700), (150, 0), (270, 0), (270, -700)]
+    return cq.Workplane("XZ").polyline(points).close().revolve(180)
+
+
+def test_extra_intersect_shapes():
+    "intersect shapes that overlap the reactor should be added to the assembly"
+    my_reactor = _spherical_tokamak(extra_intersect_shapes=[_divertor()])
+
+    assert "extra_intersect_shapes_1" in my_reactor.names()
+    assert _part(my_reactor, "extra_intersect_shapes_1").Volume() > 0
+
+
+def test_extra_intersect_shapes_outside_reactor():
+    "intersect shapes away from the reactor are added as empty parts without changing the layers"
+    far_away_shape = cq.Workplane().box(10, 10, 10).translate((0, 0, 5000))
+    my_reactor = _spherical_tokamak(extra_intersect_shapes=[_divertor(), far_away_shape])
+
+    assert "extra_intersect_shapes_1" in my_reactor.names()
+    assert "extra_intersect_shapes_2" in my_reactor.names()
+    assert not _part(my_reactor, "extra_intersect_shapes_2").Solids()
+    assert [name for name in my_reactor.names() if name.startswith("layer_")] == [
+        name for name in _spherical_tokamak(extra_intersect_shapes=[_divertor()]).names() if name.startswith("layer_")
+    ]
+
+
+def test_intersect_against():
+    "intersect shapes should be intersected with the intersect_against shape when it is given"
+    divertor = _divertor()
+    intersect_against = cq.Workplane().box(400, 1000, 200).translate((200, 0, -500))
+    my_reactor = _spherical_tokamak(extra_intersect_shapes=[divertor], intersect_against=intersect_against)
+
+    expected_volume = divertor.intersect(intersect_against).val().Volume()
+    assert _part(my_reactor, "extra_intersect_shapes_1").Volume() == pytest.approx(expected_volume)
+
+
+def test_fuzzy_value():
+    "a small fuzzy_value should cut the same parts as an exact cut"
+    cutter = cq.Workplane().box(100, 1000, 100).translate((500, 0, 0))
+    exact_reactor = _spherical_tokamak(extra_cut_shapes=[cutter])
+    fuzzy_reactor = _spherical_tokamak(extra_cut_shapes=[cutter], fuzzy_value=1e-3)
+
+    assert fuzzy_reactor.names() == exact_reactor.names()
+    for name in exact_reactor.names():
+        assert _part(fuzzy_reactor, name).Volume() == pytest.approx(_part(exact_reactor, name).Volume(), rel=1e-3)
@@ -1,4 +1,8 @@
+import cadquery as cq
+import pytest
+
 import paramak
+from paramak.assemblies.tokamak import create_layers_from_plasma
 
 
 def test_colors():
@@ -30,4 +34,207 @@ def test_colors():
             "layer_4": (0.4, 0.4, 0.8),
             "layer_5": (0.5, 0.5, 0.8),
         }
-    )
\ No newline at end of file
+    )
+
+
+def test_layers_added_without_extra_shapes():
+    "the layers should be in the assembly when no extra shapes are given"
+
+    my_reactor = paramak.tokamak_from_plasma(
+        radial_build=[
+            (paramak.LayerType.GAP, 10),
+            (paramak.LayerType.SOLID, 30),
+            (paramak.LayerType.SOLID, 20),
+            (paramak.LayerType.GAP, 60),
+            (paramak.LayerType.PLASMA, 300),
+            (paramak.LayerType.GAP, 60),
+            (paramak.LayerType.SOLID, 20),
+        ],
+    )
+    # one center column cylinder and one blanket layer
+    assert my_reactor.names() == ["layer_1", "layer_2"]
+
+
+def test_reactor_compound_cache():
+    "the fused reactor should be stored in the cache and reused by later calls"
+
+    radial_build = [
+        (paramak.LayerType.GAP, 10),
+        (paramak.LayerType.SOLID, 30),
+        (paramak.LayerType.SOLID, 20),
+        (paramak.LayerType.GAP, 60),
+        (paramak.LayerType.PLASMA, 300),
+        (paramak.LayerType.GAP, 60),
+        (paramak.LayerType.SOLID, 20),
+    ]
+    port = cq.Workplane().box(50, 500, 50).translate((600, 0, 0))
+    cache = {}
+
+    paramak.tokamak_from_plasma(
+        radial_build=radial_build,
+        extra_intersect_shapes=[port],
+        reactor_compound_cache=cache,
+    )
+    assert len(cache) == 1
+    reactor_compound = next(iter(cache.values()))
+
+    paramak.tokamak_from_plasma(
+        radial_build=radial_build,
+        extra_intersect_shapes=[port],
+        reactor_compound_cache=cache,
+    )
+    assert len(cache) == 1
+    assert next(iter(cache.values())) is reactor_compound
+
+
+def test_rotation_angle_above_full_turn():
+    "rotation angles above 360 degrees should make the same parts as a full turn"
+
+    radial_build = [
+        (paramak.LayerType.GAP, 10),
+        (paramak.LayerType.SOLID, 30),
+        (paramak.LayerType.SOLID, 20),
+        (paramak.LayerType.GAP, 60),
+        (paramak.LayerType.PLASMA, 300),
+        (paramak.LayerType.GAP, 60),
+        (paramak.LayerType.SOLID, 20),
+    ]
+    full_turn_reactor = paramak.tokamak_from_plasma(radial_build=radial_build, rotation_angle=360)
+    reactor = paramak.tokamak_from_plasma(radial_build=radial_build, rotation_angle=400)
+
+    assert reactor.names() == full_turn_reactor.names()
+    for part, full_turn_part in zip(reactor, full_turn_reactor):
+        assert part[0].Volume() == pytest.approx(full_turn_part[0].Volume())
+
+
+def _two_half_layer(upper, outer, lower, inner, plasma):
+    # the outboard and inboard halves that each layer used to be made from
+    thicknesses, offsets = zip(upper, outer, lower, inner)
+    outer_half = paramak.blanket_from_plasma(
+        thickness=[thicknesses[0], thicknesses[1], thicknesses[2]],
+        offset_from_plasma=[offsets[0], offsets[1], offsets[2]],
+        start_angle=90,
+        stop_angle=-90,
+        rotation_angle=180,
+        allow_overlapping_shape=True,
+        **plasma,
+    )
+    inner_half = paramak.blanket_from_plasma(
+        thickness=[thicknesses[2], thicknesses[3], thicknesses[0]],
+        offset_from_plasma=[offsets[2], offsets[3], offsets[0]],
+        start_angle=-90,
+        stop_angle=-270,
+        rotation_angle=180,
+        allow_overlapping_shape=True,
+        **plasma,
+    )
+    return outer_half.union(inner_half)
+
+
+def test_layers_match_two_half_blankets():
+    "each layer should keep the shape of the two blanket halves it replaced"
+
+    radial_build = (
+        (paramak.LayerType.GAP, 10),
+        (paramak.LayerType.SOLID, 40),
+        (paramak.LayerType.SOLID, 25),
+        (paramak.LayerType.GAP, 50),
+        (paramak.LayerType.PLASMA, 300),
+        (paramak.LayerType.GAP, 60),
+        (paramak.LayerType.SOLID, 20),
+        (paramak.LayerType.SOLID, 30),
+    )
+    vertical_build = (
+        (paramak.LayerType.SOLID, 35),
+        (paramak.LayerType.SOLID, 15),
+        (paramak.LayerType.GAP, 70),
+        (paramak.LayerType.PLASMA, 500),
+        (paramak.LayerType.GAP, 55),
+        (paramak.LayerType.SOLID, 10),
+        (paramak.LayerType.SOLID, 45),
+    )
+    plasma = {"major_radius": 275, "minor_radius": 150, "triangularity": 0.55, "elongation": 250 / 150}
+
+    layers = create_layers_from_plasma(
+        radial_build=radial_build, vertical_build=vertical_build, rotation_angle=180, **plasma
+    )
+    # (thickness, offset) of each layer in the upper, outer, lower and inner directions
+    expected_layers = [
+        _two_half_layer((15, 70), (20, 60), (10, 55), (25, 50), plasma),
+        _two_half_layer((35, 85), (30, 80), (45, 65), (40, 75), plasma),
+    ]
+
+    assert len(layers) == len(expected_layers)
+    for layer, expected_layer in zip(layers, expected_layers):
+        assert layer.val().Volume() == pytest.approx(expected_layer.val().Volume(), rel=1e-3)
+        box = layer.val().BoundingBox()
+        expected_box = expected_layer.val().BoundingBox()
+        for axis in ("xmin", "xmax", "ymin", "ymax", "zmin", "zmax"):
+            assert getattr(box, axis) == pytest.approx(getattr(expected_box, axis), abs=0.5)
+
+
+def test_layers_with_shorter_inner_build():
+    "an inner radial build with fewer entries than the outer build should still make every layer"
+
+    radial_build = (
+        (paramak.LayerType.GAP, 10),
+        (paramak.LayerType.SOLID, 40),
+        (paramak.LayerType.PLASMA, 300),
+        (paramak.LayerType.GAP, 60),
+        (paramak.LayerType.SOLID, 20),
+        (paramak.LayerType.SOLID, 30),
+        (paramak.LayerType.SOLID, 15),
+    )
+    vertical_build = (
+        (paramak.LayerType.SOLID, 25),
+        (paramak.LayerType.SOLID, 35),
+        (paramak.LayerType.SOLID, 15),
+        (paramak.LayerType.GAP, 70),
+        (paramak.LayerType.PLASMA, 500),
+        (paramak.LayerType.GAP, 55),
+        (paramak.LayerType.SOLID, 10),
+        (paramak.LayerType.SOLID, 45),
+        (paramak.LayerType.SOLID, 5),
+    )
+
+    layers = create_layers_from_plasma(
+        radial_build=radial_build,
+        vertical_build=vertical_build,
+        major_radius=200,
+        minor_radius=150,
+        triangularity=0.55,
+        elongation=250 / 150,
+        rotation_angle=180,
+    )
+
+    assert len(layers) == 3
+    for layer in layers:
+        assert layer.val().isValid()
+        assert layer.val().Volume() > 0
+
+
+def _layer_volume(reactor):
+    return sum(part[0].Volume() for part in reactor if part[1].split("/")[-1].startswith("layer_"))
+
+
+def test_multi_object_cut_shape():
+    "every object of a cut shape should be cut from the layers it overlaps"
+
+    radial_build = [
+        (paramak.LayerType.GAP, 10),
+        (paramak.LayerType.SOLID, 30),
+        (paramak.LayerType.SOLID, 20),
+        (paramak.LayerType.GAP, 60),
+        (paramak.LayerType.PLASMA, 300),
+        (paramak.LayerType.GAP, 60),
+        (paramak.LayerType.SOLID, 20),
+    ]
+    # the first object is away from the reactor, the second overlaps the outboard layer
+    far_box = cq.Workplane().box(10, 10, 10).translate((0, 0, 2000)).val()
+    near_box = cq.Workplane().box(100, 1000, 100).translate((500, 0, 0)).val()
+    cutter = cq.Workplane().add([far_box, near_box])
+
+    uncut_reactor = paramak.tokamak_from_plasma(radial_build=radial_build)
+    cut_reactor = paramak.tokamak_from_plasma(radial_build=radial_build, extra_cut_shapes=[cutter])
+
+    assert _layer_volume(cut_reactor) < _layer_volume(uncut_reactor)
@@ -1,11 +1,19 @@
 import pytest
+from cadquery import Workplane
 
 from paramak.utils import (
     ValidationError,
+    balanced_union,
+    bounding_box,
+    count_solids,
+    cut_workplane,
     get_gap_after_plasma,
     get_plasma_value,
+    sort_by_proximity,
     sum_after_gap_following_plasma,
     sum_up_to_plasma,
+    to_shape_list,
+    union_workplanes,
     validate_divertor_radial_build,
     validate_plasma_radial_build,
     LayerType,
@@ -1054,3 +1062,93 @@ def test_sum_after_gap_following_plasma_not_found():
     ]
     with pytest.raises(ValueError, match="LayerType.PLASMA entry not found"):
         sum_after_gap_following_plasma(radial_build)
+
+
+def test_union_workplanes_matches_union():
+    box1 = Workplane().box(2, 2, 2)
+    box2 = Workplane().moveTo(1, 0).box(2, 2, 2)
+    box3 = Workplane().moveTo(10, 0).box(1, 1, 1)
+
+    fused = union_workplanes([box1, box2, box3])
+    expected = box1.union(box2).union(box3)
+
+    assert fused.val().Volume() == pytest.approx(expected.val().Volume())
+    assert len(fused.solids().vals()) == 2
+
+
+def test_count_solids():
+    box1 = Workplane().box(2, 2, 2)
+    box2 = Workplane().moveTo(10, 0).box(2, 2, 2)
+    box3 = Workplane().moveTo(20, 0).box(2, 2, 2)
+    three_boxes = union_workplanes([box1, box2, box3])
+
+    assert count_solids(box1) == 1
+    assert count_solids(three_boxes) == 2
+    assert count_solids(three_boxes, limit=5) == 3
+
+
+def test_cut_workplane_reuses_tools():
+    cutter = Workplane().box(1, 10, 10)
+    tools = to_shape_list([cutter])
+
+    for offset in [0, 0.5]:
+        box = Workplane().moveTo(offset, 0).box(2, 2, 2)
+        result = cut_workplane(box, tools)
+        expected = box.cut(cutter)
+        assert result.val().Volume() == pytest.approx(expected.val().Volume())
+
+
+def test_bounding_box_is_out():
+    box1 = bounding_box(Workplane().box(2, 2, 2))
+    box2 = bounding_box(Workplane().moveTo(1, 0).box(2, 2, 2))
+    box3 = bounding_box(Workplane().moveTo(10, 0).box(2, 2, 2))
+
+    assert not box1.IsOut(box2)
+    assert box1.IsOut(box3)
+
+
+def test_bounding_box_includes_every_shape():
+    far_box = Workplane().moveTo(10, 0).box(2, 2, 2).val()
+    near_box = Workplane().box(2, 2, 2).val()
+    # only the last shape is close to the test box
+    two_boxes = Workplane().add([far_box, near_box])
+
+    assert not bounding_box(two_boxes).IsOut(bounding_box(Workplane().box(1, 1, 1)))
+
+
+@pytest.mark.parametrize("number_of_boxes", [1, 2, 5])
+def test_balanced_union(number_of_boxes):
+    boxes = [Workplane().moveTo(i, 0).box(2, 2, 2) for i in range(number_of_boxes)]
+
+    result = balanced_union(boxes)
+
+    assert result.val().Volume() == pytest.approx(2 * 2 * (number_of_boxes + 1))
+
+
+def test_sort_by_proximity():
+    far = Workplane().moveTo(20, 0).box(2, 2, 2)
+    near = Workplane().moveTo(5, 0).box(2, 2, 2)
+    middle_high = Workplane().moveTo(10, 0).box(2, 2, 2).translate((0, 0, 10))
+    middle_low = Workplane().moveTo(10, 0).box(2, 2, 2)
+
+    assert sort_by_proximity([far, middle_high, near, middle_low]) == [near, middle_low, middle_high, far]
+
+
+def test_union_workplanes_glue_touching_boxes():
+    box1 = Workplane().box(2, 2, 2)
+    box2 = Workplane().moveTo(2, 0).box(2, 2, 2)
+
+    fused = union_workplanes([box1, box2], glue=True)
+
+    assert fused.val().Volume() == pytest.approx(16)
+    assert len(fused.solids().vals()) == 1
+
+
+def test_union_workplanes_glue_overlapping_boxes():
+    box1 = Workplane().box(2, 2, 2)
+    box2 = Workplane().moveTo(1, 0).box(2, 2, 2)
+
+    fused = union_workplanes([box1, box2], glue=True)
+
+    assert fused.val().Volume() == pytest.approx(12)
+    assert fused.val().isValid()
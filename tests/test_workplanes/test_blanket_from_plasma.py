@@ -1,10 +1,12 @@
 import os
 from pathlib import Path
 
+import numpy as np
 import pytest
 from cadquery import exporters
 
 import paramak
+from paramak.workplanes.blanket_from_plasma import plasma_boundary
 
 plasma = paramak.plasma_simplified(
     major_radius=450, minor_radius=150, triangularity=0.55, elongation=2, rotation_angle=160
@@ -35,6 +37,38 @@ def test_faces():
     assert len(test_shape.vals()[0].Faces()) == 6
 
 
+def test_sample_angles():
+    """Checks that passing the sample angles gives the same blanket as
+    passing the equivalent start_angle, stop_angle and num_points."""
+
+    default_shape = paramak.blanket_from_plasma(thickness=150, start_angle=-90, stop_angle=240, num_points=40)
+    sampled_shape = paramak.blanket_from_plasma(
+        thickness=150, start_angle=-90, stop_angle=240, sample_angles=np.linspace(-90, 240, 40)
+    )
+
+    assert sampled_shape.vals()[0].Volume() == pytest.approx(default_shape.vals()[0].Volume())
+
+
+def test_plasma_points():
+    """Checks that passing a precomputed plasma boundary gives the same
+    blanket as sampling the plasma parameters."""
+
+    default_shape = paramak.blanket_from_plasma(
+        thickness=150, start_angle=-90, stop_angle=240, num_points=40, minor_radius=100, major_radius=300
+    )
+    plasma_points = plasma_boundary(np.linspace(-90, 240, 40), minor_radius=100, major_radius=300)
+    boundary_shape = paramak.blanket_from_plasma(
+        thickness=150,
+        start_angle=-90,
+        stop_angle=240,
+        minor_radius=100,
+        major_radius=300,
+        plasma_points=plasma_points,
+    )
+
+    assert boundary_shape.vals()[0].Volume() == pytest.approx(default_shape.vals()[0].Volume())
+
+
 def test_creation_variable_thickness_from_tuple():
     """Checks that a cadquery solid can be created using the BlanketFP
     parametric component when a tuple of thicknesses is passed as an